@@ -1,9 +1,11 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import time
+import io
+from concurrent.futures import ThreadPoolExecutor
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from pathlib import Path
 import os
 
@@ -11,6 +13,19 @@ from src.data.loader import load_item_data, load_supplier_data, load_pricing_dat
 from src.utils.preprocessing import prepare_data_for_optimization
 from src.models.optimizer import create_optimization_model, solve_model
 
+# Every chart uses the same clean white template
+pio.templates.default = 'plotly_white'
+
+# Layout shared by all charts; section titles are rendered by the page, not by Plotly
+BASE_LAYOUT = dict(
+    title='',
+    coloraxis_showscale=False,
+    margin=dict(l=30, r=10, t=30, b=30)
+)
+
+# Rows of the pricing table sent to the browser until "Show all rows" is ticked
+PRICING_PREVIEW_ROWS = 200
+
 st.set_page_config(
     page_title="Stock Purchasing Optimizer",
     page_icon="📦",
@@ -86,27 +101,60 @@ View your current inventory, supplier information, and pricing data, then run th
 @st.cache_data
 def load_all_data():
     try:
-        items_df = load_item_data()
-        suppliers_df = load_supplier_data()
-        pricing_df = load_pricing_data()
-        return items_df, suppliers_df, pricing_df
+        # The three files are independent, so read them concurrently
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            items_future = executor.submit(load_item_data)
+            suppliers_future = executor.submit(load_supplier_data)
+            pricing_future = executor.submit(load_pricing_data)
+            return items_future.result(), suppliers_future.result(), pricing_future.result()
     except Exception as e:
         st.error(f"Error loading data: {e}")
         return None, None, None
 
-items_df, suppliers_df, pricing_df = load_all_data()
+@st.cache_data
+def build_pricing_pivot(pricing_df, items_df, suppliers_df):
+    # Pivot on the integer ids first and attach names afterwards, no merges needed
+    pivot_df = pricing_df.pivot(
+        index='SupplierID', 
+        columns='ItemID', 
+        values='CostPerPallet'
+    )
+    pivot_df.index = pivot_df.index.map(suppliers_df.set_index('SupplierID')['Name'])
+    pivot_df.columns = pivot_df.columns.map(items_df.set_index('ItemID')['Name'])
+    
+    return pivot_df
 
-st.header("Source Data")
+@st.cache_data
+def compute_item_metrics(items_df):
+    return {
+        'total_items': len(items_df),
+        # Compare and count on the raw arrays, without building a mask Series or filtered frame
+        'below_min': int((items_df['CurrentStock'].to_numpy() < items_df['MinStock'].to_numpy()).sum()),
+        'total_current_stock': int(items_df['CurrentStock'].sum()),
+        'total_min_stock': int(items_df['MinStock'].sum())
+    }
 
-tab1, tab2, tab3 = st.tabs(["Items", "Suppliers", "Pricing"])
+@st.cache_data
+def summarize_orders_by_supplier(results_df):
+    return results_df.groupby('SupplierName', observed=True, sort=False).agg({
+        'PalletsOrdered': 'sum',
+        'UnitsOrdered': 'sum',
+        'TotalCost': 'sum'
+    }).reset_index()
 
-with tab1:
-    st.markdown('<div class="section-title">Item Inventory Data</div>', unsafe_allow_html=True)
-    st.markdown('<div class="table-container">', unsafe_allow_html=True)
-    st.dataframe(items_df, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    st.markdown('<div class="section-title">Current Stock vs Min/Max Stock Levels</div>', unsafe_allow_html=True)
+@st.cache_data
+def summarize_orders_by_item(results_df):
+    return results_df.groupby('ItemName', observed=True, sort=False).agg({
+        'PalletsOrdered': 'sum',
+        'UnitsOrdered': 'sum',
+        'TotalCost': 'sum'
+    }).reset_index()
+
+# Figures are cached with cache_resource, which hands back the same object on a hit instead of
+# unpickling (and re-validating) a copy like cache_data would. They are only ever passed to
+# st.plotly_chart, which doesn't modify them, so sharing them between reruns is safe.
+@st.cache_resource
+def make_stock_levels_fig(items_df):
     fig = go.Figure()
     
     fig.add_trace(go.Bar(
@@ -116,7 +164,7 @@ with tab1:
         marker_color='#4CAF50'
     ))
     
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=items_df['Name'],
         y=items_df['MinStock'],
         mode='lines',
@@ -124,7 +172,7 @@ with tab1:
         line=dict(color='red', width=2, dash='dash')
     ))
     
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=items_df['Name'],
         y=items_df['MaxStock'],
         mode='lines',
@@ -133,7 +181,7 @@ with tab1:
     ))
     
     fig.update_layout(
-        title='',
+        **BASE_LAYOUT,
         xaxis_title='Item',
         yaxis_title='Stock Level',
         legend=dict(
@@ -142,52 +190,40 @@ with tab1:
             y=1.02,
             xanchor="right",
             x=1
-        ),
-        template='plotly_white'
+        )
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-with tab2:
-    st.markdown('<div class="section-title">Supplier Information</div>', unsafe_allow_html=True)
-    st.markdown('<div class="table-container">', unsafe_allow_html=True)
-    st.dataframe(suppliers_df, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
-    
-    st.markdown('<div class="section-title">Supplier Capacity (Min/Max Pallets)</div>', unsafe_allow_html=True)
+@st.cache_resource
+def make_supplier_capacity_fig(suppliers_df):
     fig = go.Figure()
     
-    for i, supplier in suppliers_df.iterrows():
-        fig.add_trace(go.Bar(
-            x=[supplier['Name']],
-            y=[supplier['MaxPallets']],
-            name=f"{supplier['Name']} Max",
-            marker_color='#1E88E5',
-            width=0.4,
-            offset=-0.2
-        ))
-        
-        fig.add_trace(go.Bar(
-            x=[supplier['Name']],
-            y=[supplier['MinPallets']],
-            name=f"{supplier['Name']} Min",
-            marker_color='#FFC107',
-            width=0.4,
-            offset=0.2
-        ))
+    fig.add_trace(go.Bar(
+        x=suppliers_df['Name'],
+        y=suppliers_df['MaxPallets'],
+        name='Max Pallets',
+        marker_color='#1E88E5'
+    ))
+    
+    fig.add_trace(go.Bar(
+        x=suppliers_df['Name'],
+        y=suppliers_df['MinPallets'],
+        name='Min Pallets',
+        marker_color='#FFC107'
+    ))
     
     fig.update_layout(
+        **BASE_LAYOUT,
         barmode='group',
-        title='',
         xaxis_title='Supplier',
-        yaxis_title='Pallets',
-        template='plotly_white',
-        showlegend=False
+        yaxis_title='Pallets'
     )
     
-    st.plotly_chart(fig, use_container_width=True)
-    
-    st.markdown('<div class="section-title">Supplier Lead Time (Days)</div>', unsafe_allow_html=True)
+    return fig
+
+@st.cache_resource
+def make_lead_time_fig(suppliers_df):
     fig = px.bar(
         suppliers_df, 
         x='Name', 
@@ -197,79 +233,195 @@ with tab2:
         labels={'Name': 'Supplier', 'LeadTime (days)': 'Lead Time (Days)'}
     )
     
-    fig.update_layout(
-        title='',
-        template='plotly_white',
-        coloraxis_showscale=False
-    )
+    fig.update_layout(**BASE_LAYOUT)
     
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
-with tab3:
-    st.markdown('<div class="section-title">Pricing Information</div>', unsafe_allow_html=True)
-    st.markdown('<div class="table-container">', unsafe_allow_html=True)
-    st.dataframe(pricing_df, use_container_width=True)
-    st.markdown('</div>', unsafe_allow_html=True)
+@st.cache_resource
+def make_pricing_heatmap_fig(pivot_df):
+    # One float32 cost matrix plus the axis names, with no per-cell strings. plotly.js draws a
+    # heatmap as a single raster image, so large matrices don't turn into one SVG cell per pair,
+    # and the hover and colorbar still show the actual costs.
+    fig = go.Figure(go.Heatmap(
+        z=pivot_df.to_numpy(dtype=np.float32),
+        x=list(pivot_df.columns),
+        y=list(pivot_df.index),
+        coloraxis='coloraxis',
+        hoverongaps=False,
+        hovertemplate='Supplier: %{y}<br>Item: %{x}<br>Cost per pallet: $%{z:,.2f}<extra></extra>'
+    ))
     
-    pricing_with_names = pricing_df.merge(
-        items_df[['ItemID', 'Name']], 
-        on='ItemID'
-    ).merge(
-        suppliers_df[['SupplierID', 'Name']], 
-        on='SupplierID',
-        suffixes=('_Item', '_Supplier')
-    )
+    fig.update_xaxes(title_text='Item')
+    fig.update_yaxes(title_text='Supplier', autorange='reversed')
     
-    st.markdown('<div class="section-title">Cost Per Pallet by Supplier and Item</div>', unsafe_allow_html=True)
+    fig.update_layout(**BASE_LAYOUT)
+    fig.update_layout(coloraxis=dict(
+        colorscale='Viridis', showscale=True, colorbar=dict(title='Cost per pallet')
+    ))
     
-    pivot_df = pricing_with_names.pivot(
-        index='Name_Supplier', 
-        columns='Name_Item', 
-        values='CostPerPallet'
+    return fig
+
+@st.cache_resource
+def make_cost_distribution_fig(results_df):
+    fig = px.pie(
+        results_df, 
+        values='TotalCost', 
+        names='ItemName',
+        hole=0.4,
+        color_discrete_sequence=px.colors.qualitative.Pastel
     )
     
-    fig = px.imshow(
-        pivot_df,
-        labels=dict(x="Item", y="Supplier", color="Cost Per Pallet"),
-        x=pivot_df.columns,
-        y=pivot_df.index,
+    fig.update_layout(**BASE_LAYOUT)
+    
+    return fig
+
+@st.cache_resource
+def make_summary_bar_fig(summary_df, x, y, labels):
+    fig = px.bar(
+        summary_df,
+        x=x,
+        y=y,
+        color=y,
         color_continuous_scale='Viridis',
-        aspect="auto"
+        labels=labels
     )
     
+    fig.update_layout(**BASE_LAYOUT)
+    
+    return fig
+
+@st.cache_resource
+def make_stock_comparison_fig(stock_comparison):
+    fig = go.Figure()
+    
+    fig.add_trace(go.Bar(
+        x=stock_comparison['ItemName'],
+        y=stock_comparison['BeforeStock'],
+        name='Before Optimization',
+        marker_color='#FFC107'
+    ))
+    
+    fig.add_trace(go.Bar(
+        x=stock_comparison['ItemName'],
+        y=stock_comparison['AfterStock'],
+        name='After Optimization',
+        marker_color='#4CAF50'
+    ))
+    
+    fig.add_trace(go.Scattergl(
+        x=stock_comparison['ItemName'],
+        y=stock_comparison['MinStock'],
+        mode='lines',
+        name='Min Stock',
+        line=dict(color='red', width=2, dash='dash')
+    ))
+    
+    fig.add_trace(go.Scattergl(
+        x=stock_comparison['ItemName'],
+        y=stock_comparison['MaxStock'],
+        mode='lines',
+        name='Max Stock',
+        line=dict(color='blue', width=2, dash='dash')
+    ))
+    
     fig.update_layout(
-        title='',
-        template='plotly_white'
+        **BASE_LAYOUT,
+        barmode='group',
+        xaxis_title='Item',
+        yaxis_title='Stock Level',
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
     )
     
+    return fig
+
+@st.cache_data
+def results_to_csv(results_df):
+    buffer = io.BytesIO()
+    results_df.to_csv(buffer, index=False, lineterminator='\n')
+    return buffer.getvalue()
+
+items_df, suppliers_df, pricing_df = load_all_data()
+
+st.header("Source Data")
+
+tab1, tab2, tab3 = st.tabs(["Items", "Suppliers", "Pricing"])
+
+with tab1:
+    st.markdown('<div class="section-title">Item Inventory Data</div>', unsafe_allow_html=True)
+    st.markdown('<div class="table-container">', unsafe_allow_html=True)
+    st.dataframe(items_df, use_container_width=True, hide_index=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.markdown('<div class="section-title">Current Stock vs Min/Max Stock Levels</div>', unsafe_allow_html=True)
+    fig = make_stock_levels_fig(items_df)
+    st.plotly_chart(fig, use_container_width=True)
+
+with tab2:
+    st.markdown('<div class="section-title">Supplier Information</div>', unsafe_allow_html=True)
+    st.markdown('<div class="table-container">', unsafe_allow_html=True)
+    st.dataframe(suppliers_df, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.markdown('<div class="section-title">Supplier Capacity (Min/Max Pallets)</div>', unsafe_allow_html=True)
+    fig = make_supplier_capacity_fig(suppliers_df)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.markdown('<div class="section-title">Supplier Lead Time (Days)</div>', unsafe_allow_html=True)
+    fig = make_lead_time_fig(suppliers_df)
+    st.plotly_chart(fig, use_container_width=True)
+
+with tab3:
+    st.markdown('<div class="section-title">Pricing Information</div>', unsafe_allow_html=True)
+    # The pricing table grows with suppliers x items, so only ship a preview unless asked for more
+    show_all_pricing = len(pricing_df) <= PRICING_PREVIEW_ROWS or st.checkbox(
+        f"Show all {len(pricing_df)} rows", key="pricing-show-all"
+    )
+    pricing_view = pricing_df if show_all_pricing else pricing_df.head(PRICING_PREVIEW_ROWS)
+    st.markdown('<div class="table-container">', unsafe_allow_html=True)
+    st.dataframe(pricing_view, use_container_width=True)
+    st.markdown('</div>', unsafe_allow_html=True)
+    
+    st.markdown('<div class="section-title">Cost Per Pallet by Supplier and Item</div>', unsafe_allow_html=True)
+    
+    pivot_df = build_pricing_pivot(pricing_df, items_df, suppliers_df)
+    fig = make_pricing_heatmap_fig(pivot_df)
     st.plotly_chart(fig, use_container_width=True)
 
 st.header("Optimization")
 
+item_metrics = compute_item_metrics(items_df)
+
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
+    total_items = item_metrics['total_items']
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-    st.markdown(f'<div class="metric-value">{len(items_df)}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="metric-value">{total_items}</div>', unsafe_allow_html=True)
     st.markdown('<div class="metric-label">Total Items</div>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 with col2:
-    below_min = len(items_df[items_df['CurrentStock'] < items_df['MinStock']])
+    below_min = item_metrics['below_min']
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
     st.markdown(f'<div class="metric-value">{below_min}</div>', unsafe_allow_html=True)
     st.markdown('<div class="metric-label">Items Below Min Stock</div>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 with col3:
-    total_current_stock = items_df['CurrentStock'].sum()
+    total_current_stock = item_metrics['total_current_stock']
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
     st.markdown(f'<div class="metric-value">{total_current_stock}</div>', unsafe_allow_html=True)
     st.markdown('<div class="metric-label">Total Current Stock</div>', unsafe_allow_html=True)
     st.markdown('</div>', unsafe_allow_html=True)
 
 with col4:
-    total_min_stock = items_df['MinStock'].sum()
+    total_min_stock = item_metrics['total_min_stock']
     st.markdown('<div class="metric-card">', unsafe_allow_html=True)
     st.markdown(f'<div class="metric-value">{total_min_stock}</div>', unsafe_allow_html=True)
     st.markdown('<div class="metric-label">Total Min Stock Required</div>', unsafe_allow_html=True)
@@ -282,17 +434,19 @@ results_container = st.container()
 
 if optimize_button:
     with st.spinner('Optimizing your stock purchasing plan...'):
-        data = prepare_data_for_optimization(items_df, suppliers_df, pricing_df)
-        
         progress_bar = st.progress(0)
         
-        for i in range(101):
-            progress_bar.progress(i)
-            time.sleep(0.02)
+        # Progress follows the actual optimization phases
+        progress_bar.progress(10, text="Preparing data")
+        data = prepare_data_for_optimization(items_df, suppliers_df, pricing_df)
         
+        progress_bar.progress(40, text="Building model")
         model, x = create_optimization_model(data)
+        
+        progress_bar.progress(70, text="Solving")
         results_df, total_cost = solve_model(model, x, data)
         
+        progress_bar.progress(100)
         progress_bar.empty()
         
         with results_container:
@@ -340,29 +494,13 @@ if optimize_button:
                     st.markdown('</div>', unsafe_allow_html=True)
                     
                     st.markdown('<div class="section-title">Cost Distribution</div>', unsafe_allow_html=True)
-                    fig = px.pie(
-                        results_df, 
-                        values='TotalCost', 
-                        names='ItemName',
-                        hole=0.4,
-                        color_discrete_sequence=px.colors.qualitative.Pastel
-                    )
-                    
-                    fig.update_layout(
-                        title='',
-                        template='plotly_white'
-                    )
-                    
+                    fig = make_cost_distribution_fig(results_df)
                     st.plotly_chart(fig, use_container_width=True)
                 
                 with viz_tab2:
                     st.markdown('<div class="section-title">Orders by Supplier</div>', unsafe_allow_html=True)
                     
-                    supplier_summary = results_df.groupby('SupplierName').agg({
-                        'PalletsOrdered': 'sum',
-                        'UnitsOrdered': 'sum',
-                        'TotalCost': 'sum'
-                    }).reset_index()
+                    supplier_summary = summarize_orders_by_supplier(results_df)
                     
                     st.markdown('<div class="table-container">', unsafe_allow_html=True)
                     st.dataframe(supplier_summary, use_container_width=True)
@@ -372,50 +510,24 @@ if optimize_button:
                     
                     with col1:
                         st.markdown('<div class="section-title">Pallets by Supplier</div>', unsafe_allow_html=True)
-                        fig = px.bar(
-                            supplier_summary,
-                            x='SupplierName',
-                            y='PalletsOrdered',
-                            color='PalletsOrdered',
-                            color_continuous_scale='Viridis',
-                            labels={'SupplierName': 'Supplier', 'PalletsOrdered': 'Pallets Ordered'}
+                        fig = make_summary_bar_fig(
+                            supplier_summary, 'SupplierName', 'PalletsOrdered',
+                            {'SupplierName': 'Supplier', 'PalletsOrdered': 'Pallets Ordered'}
                         )
-                        
-                        fig.update_layout(
-                            title='',
-                            template='plotly_white',
-                            coloraxis_showscale=False
-                        )
-                        
                         st.plotly_chart(fig, use_container_width=True)
                     
                     with col2:
                         st.markdown('<div class="section-title">Cost by Supplier</div>', unsafe_allow_html=True)
-                        fig = px.bar(
-                            supplier_summary,
-                            x='SupplierName',
-                            y='TotalCost',
-                            color='TotalCost',
-                            color_continuous_scale='Viridis',
-                            labels={'SupplierName': 'Supplier', 'TotalCost': 'Total Cost ($)'}
-                        )
-                        
-                        fig.update_layout(
-                            title='',
-                            template='plotly_white',
-                            coloraxis_showscale=False
+                        fig = make_summary_bar_fig(
+                            supplier_summary, 'SupplierName', 'TotalCost',
+                            {'SupplierName': 'Supplier', 'TotalCost': 'Total Cost ($)'}
                         )
-                        
                         st.plotly_chart(fig, use_container_width=True)
                 
                 with viz_tab3:
                     st.markdown('<div class="section-title">Orders by Item</div>', unsafe_allow_html=True)
                     
-                    item_summary = results_df.groupby('ItemName').agg({
-                        'PalletsOrdered': 'sum',
-                        'UnitsOrdered': 'sum',
-                        'TotalCost': 'sum'
-                    }).reset_index()
+                    item_summary = summarize_orders_by_item(results_df)
                     
                     st.markdown('<div class="table-container">', unsafe_allow_html=True)
                     st.dataframe(item_summary, use_container_width=True)
@@ -425,119 +537,43 @@ if optimize_button:
                     
                     with col1:
                         st.markdown('<div class="section-title">Units by Item</div>', unsafe_allow_html=True)
-                        fig = px.bar(
-                            item_summary,
-                            x='ItemName',
-                            y='UnitsOrdered',
-                            color='UnitsOrdered',
-                            color_continuous_scale='Viridis',
-                            labels={'ItemName': 'Item', 'UnitsOrdered': 'Units Ordered'}
+                        fig = make_summary_bar_fig(
+                            item_summary, 'ItemName', 'UnitsOrdered',
+                            {'ItemName': 'Item', 'UnitsOrdered': 'Units Ordered'}
                         )
-                        
-                        fig.update_layout(
-                            title='',
-                            template='plotly_white',
-                            coloraxis_showscale=False
-                        )
-                        
                         st.plotly_chart(fig, use_container_width=True)
                     
                     with col2:
                         st.markdown('<div class="section-title">Cost by Item</div>', unsafe_allow_html=True)
-                        fig = px.bar(
-                            item_summary,
-                            x='ItemName',
-                            y='TotalCost',
-                            color='TotalCost',
-                            color_continuous_scale='Viridis',
-                            labels={'ItemName': 'Item', 'TotalCost': 'Total Cost ($)'}
-                        )
-                        
-                        fig.update_layout(
-                            title='',
-                            template='plotly_white',
-                            coloraxis_showscale=False
+                        fig = make_summary_bar_fig(
+                            item_summary, 'ItemName', 'TotalCost',
+                            {'ItemName': 'Item', 'TotalCost': 'Total Cost ($)'}
                         )
-                        
                         st.plotly_chart(fig, use_container_width=True)
                 
                 # Stock level comparison (before and after optimization)
                 st.markdown('<div class="section-title">Stock Level Comparison (Before vs After Optimization)</div>', unsafe_allow_html=True)
                 
                 # Create a dataframe with before and after stock levels
-                stock_comparison = pd.DataFrame()
-                stock_comparison['ItemID'] = items_df['ItemID']
-                stock_comparison['ItemName'] = items_df['Name']
-                stock_comparison['BeforeStock'] = items_df['CurrentStock']
+                stock_comparison = items_df[['ItemID', 'Name', 'CurrentStock', 'MinStock', 'MaxStock']].rename(
+                    columns={'Name': 'ItemName', 'CurrentStock': 'BeforeStock'}
+                ).copy()
                 
-                # Calculate after stock by adding ordered units to current stock
-                after_stock = items_df['CurrentStock'].copy()
-                for _, row in results_df.iterrows():
-                    item_id = row['ItemID']
-                    units_ordered = row['UnitsOrdered']
-                    idx = stock_comparison[stock_comparison['ItemID'] == item_id].index
-                    if len(idx) > 0:
-                        after_stock.iloc[idx[0]] += units_ordered
-                
-                stock_comparison['AfterStock'] = after_stock
-                stock_comparison['MinStock'] = items_df['MinStock']
-                stock_comparison['MaxStock'] = items_df['MaxStock']
+                # Calculate after stock by adding the units ordered per item to current stock
+                # (items_df is indexed by ItemID, so the per-item totals align on the index directly)
+                ordered = results_df.groupby('ItemID', observed=True, sort=False)['UnitsOrdered'].sum()
+                stock_comparison['AfterStock'] = stock_comparison['BeforeStock'].add(
+                    ordered.reindex(stock_comparison.index, fill_value=0)
+                ).astype('int64')
                 
                 # Create a bar chart comparing before and after stock levels
-                fig = go.Figure()
-                
-                fig.add_trace(go.Bar(
-                    x=stock_comparison['ItemName'],
-                    y=stock_comparison['BeforeStock'],
-                    name='Before Optimization',
-                    marker_color='#FFC107'
-                ))
-                
-                fig.add_trace(go.Bar(
-                    x=stock_comparison['ItemName'],
-                    y=stock_comparison['AfterStock'],
-                    name='After Optimization',
-                    marker_color='#4CAF50'
-                ))
-                
-                fig.add_trace(go.Scatter(
-                    x=stock_comparison['ItemName'],
-                    y=stock_comparison['MinStock'],
-                    mode='lines',
-                    name='Min Stock',
-                    line=dict(color='red', width=2, dash='dash')
-                ))
-                
-                fig.add_trace(go.Scatter(
-                    x=stock_comparison['ItemName'],
-                    y=stock_comparison['MaxStock'],
-                    mode='lines',
-                    name='Max Stock',
-                    line=dict(color='blue', width=2, dash='dash')
-                ))
-                
-                fig.update_layout(
-                    barmode='group',
-                    title='',
-                    xaxis_title='Item',
-                    yaxis_title='Stock Level',
-                    legend=dict(
-                        orientation="h",
-                        yanchor="bottom",
-                        y=1.02,
-                        xanchor="right",
-                        x=1
-                    ),
-                    template='plotly_white'
-                )
-                
+                fig = make_stock_comparison_fig(stock_comparison)
                 st.plotly_chart(fig, use_container_width=True)
                 
                 # Download button for the results
-                csv = results_df.to_csv(index=False)
                 st.download_button(
                     label="📥 Download Optimization Results",
-                    data=csv,
+                    data=results_to_csv(results_df),
                     file_name="optimal_purchasing_plan.csv",
                     mime="text/csv",
                     key="download-csv"
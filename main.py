@@ -3,15 +3,14 @@ import numpy as np
 from pathlib import Path
 import os
 
-from src.data.loader import load_item_data, load_supplier_data, load_pricing_data
+from src.data.loader import SOURCE_DIR, load_item_data, load_supplier_data, load_pricing_data
 from src.utils.preprocessing import prepare_data_for_optimization
 from src.models.optimizer import create_optimization_model, solve_model, save_results
 
 def main():
     # Ensure the Source directory exists and is accessible
-    source_dir = Path("Source")
-    if not source_dir.exists():
-        print(f"Error: Source directory not found at {source_dir.absolute()}")
+    if not SOURCE_DIR.exists():
+        print(f"Error: Source directory not found at {SOURCE_DIR}")
         return
     
     # Load data
@@ -1,17 +1,122 @@
 # ths module handles loading the CSV files aontaining supplier data, item data & the mapping between suppliers and items
 
+import functools
+import hashlib
+import os
+import tempfile
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
-def load_data_from_source(filename):
-    # Get the project root directory (where main.py is located)
-    project_root = Path.cwd()
+try:
+    from streamlit import cache_data, runtime
+except ImportError:
+    # streamlit is only needed for the dashboard, main.py and the tests run without it
+    cache_data = None
+    runtime = None
+
+# Source CSVs live next to main.py, two levels above this package
+SOURCE_DIR = Path(__file__).resolve().parents[2] / "Source"
+
+# Parsed copies of the CSVs are kept here as parquet, which is much faster to read back
+CACHE_DIR = SOURCE_DIR.parent / ".cache"
+
+# Bumped whenever the way files are parsed changes, so older parquet copies are never reused
+CACHE_FORMAT = 2
+
+# Explicit schemas for the Source CSVs, so the pyarrow reader never has to infer types
+ITEM_DTYPES = {
+    'ItemID': 'int32',
+    'Name': 'string[pyarrow]',
+    'MinStock': 'int32',
+    'MaxStock': 'int32',
+    'Expiry (days)': 'int32',
+    'CurrentStock': 'int32',
+    'AverageDailySale': 'int32'
+}
+
+SUPPLIER_DTYPES = {
+    'SupplierID': 'int32',
+    'Name': 'string[pyarrow]',
+    'MinPallets': 'int32',
+    'MaxPallets': 'int32',
+    'LeadTime (days)': 'int32'
+}
+
+PRICING_DTYPES = {
+    'SupplierID': 'int32',
+    'ItemID': 'int32',
+    # Money stays float64: float32 can't hold cents exactly (499.99 would load as 499.98999...)
+    'CostPerPallet': 'float64'
+}
+
+def _downcast(df):
+    # Frames read without a schema come back with 64-bit integers; shrink those to int32 when the
+    # values fit, which halves what st.dataframe and Plotly have to serialize. Integers stop at int32
+    # (rather than the smallest type that fits) so arithmetic like daily sale * expiry days can't
+    # overflow. Floats are left at float64: float32 can't hold prices like 499.99 exactly.
+    int32 = np.iinfo(np.int32)
+    for column in df.select_dtypes(include='int64').columns:
+        if df[column].between(int32.min, int32.max).all():
+            df[column] = df[column].astype('int32')
+    return df
+
+def _parquet_cache_path(file_path, dtypes):
+    # Tag the cache file with the schema and format so changing either never serves a stale copy
+    schema_tag = hashlib.sha1(repr((CACHE_FORMAT, dtypes)).encode()).hexdigest()[:8]
+    return CACHE_DIR / f"{file_path.name}.{schema_tag}.parquet"
+
+def _read_source_file(file_path, mtime, dtypes):
+    # Reuse the parquet copy as long as it is at least as new as the CSV. A copy that can't be
+    # read (e.g. left truncated by a killed process) is ignored, and rewritten from the CSV below.
+    cache_path = _parquet_cache_path(file_path, dtypes)
+    if cache_path.exists() and cache_path.stat().st_mtime >= mtime:
+        try:
+            return pd.read_parquet(cache_path, engine="pyarrow")
+        except Exception as e:
+            print(f"Ignoring unreadable parquet cache for {file_path.name}: {e}")
+    
+    if dtypes is None:
+        df = _downcast(pd.read_csv(file_path, engine="pyarrow"))
+    else:
+        # The schema already picks every column's type
+        df = pd.read_csv(file_path, engine="pyarrow", dtype=dict(dtypes), usecols=[c for c, _ in dtypes])
     
+    # The parquet copy is only an optimisation, so a read-only checkout just skips it. It's written
+    # to a temporary file first and moved into place, so readers never see a half-written copy.
+    try:
+        CACHE_DIR.mkdir(exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=CACHE_DIR, suffix=".tmp", delete=False) as tmp_file:
+            tmp_path = Path(tmp_file.name)
+        try:
+            df.to_parquet(tmp_path, engine="pyarrow", compression="zstd", index=False)
+            os.replace(tmp_path, cache_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    except OSError as e:
+        print(f"Could not cache {file_path.name} as parquet: {e}")
+    return df
+
+if runtime is not None and runtime.exists():
+    # st.cache_data already hands out a fresh copy on every hit
+    _read_source_file_cached = cache_data(show_spinner=False)(_read_source_file)
+else:
+    # Outside of a Streamlit session (main.py, tests) we fall back to a plain in-process cache
+    _read_source_file_lru = functools.lru_cache(maxsize=None)(_read_source_file)
+
+    def _read_source_file_cached(file_path, mtime, dtypes):
+        # lru_cache returns the same object every time, so never give callers the cached frame itself
+        return _read_source_file_lru(file_path, mtime, dtypes).copy(deep=False)
+
+def load_data_from_source(filename, dtypes=None):
     # Construct the path to the file in the Source directory
-    file_path = project_root / "Source" / filename
+    file_path = SOURCE_DIR / filename
+    
+    # The schema is passed as a tuple so it can be part of the cache key
+    dtypes = tuple(dtypes.items()) if dtypes is not None else None
     
     try:
-        df = pd.read_csv(file_path)
+        df = _read_source_file_cached(file_path, file_path.stat().st_mtime, dtypes)
         print(f"Successfully loaded {filename} with {len(df)} records")
         return df
     except Exception as e:
@@ -19,13 +124,16 @@ def load_data_from_source(filename):
         raise
 
 def load_item_data():
-    return load_data_from_source("items_updated.csv")
+    # Index by ItemID (keeping the column too) so single items are a hash lookup with .loc.
+    # The index is left unnamed so 'ItemID' stays unambiguous for merges and groupbys.
+    items_df = load_data_from_source("items_updated.csv", ITEM_DTYPES)
+    return items_df.set_index('ItemID', drop=False).rename_axis(None)
 
 def load_supplier_data():
-    return load_data_from_source("suppliers.csv")
+    return load_data_from_source("suppliers.csv", SUPPLIER_DTYPES)
 
 def load_pricing_data():
-    return load_data_from_source("pricing.csv")
+    return load_data_from_source("pricing.csv", PRICING_DTYPES)
 
 def get_available_suppliers_for_item(pricing_df, item_id):
     # Based on the actual column names in pricing.csv
@@ -1,93 +1,287 @@
+import csv
+import os
+import subprocess
+import tempfile
+import weakref
 import pulp
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+def _pair_upper_bound_array(data):
+    # Most pallets of item i that can ever be ordered from supplier j, for every pair in data['pairs'].
+    # Both the max stock level and the lead time/expiry rule cap it, so a bound of 0 means the pair
+    # can't be part of any solution.
+    items = data['items'].values()
+    n_items = len(data['items'])
+    current_stock = np.fromiter((item_data['current_stock'] for item_data in items), dtype=np.float64, count=n_items)
+    max_stock = np.fromiter((item_data['max_stock'] for item_data in items), dtype=np.float64, count=n_items)
+    expected_demand = np.fromiter((item_data['expected_demand'] for item_data in items), dtype=np.float64, count=n_items)
+    daily_sales = np.fromiter((item_data['average_daily_sale'] for item_data in items), dtype=np.float64, count=n_items)
+    lead_times = np.fromiter(
+        (supplier_data['lead_time'] for supplier_data in data['suppliers'].values()),
+        dtype=np.float64, count=len(data['suppliers'])
+    )
+    
+    # Sales during the supplier's lead time, multiplied per pair (O(pairs), no item x supplier table)
+    pair_item = data['pair_item']
+    demand_during_lead_time = daily_sales[pair_item] * lead_times[data['pair_supplier']]
+    
+    # Stock we can still sell before expiry (including during the lead time), and room below max stock
+    sellable_units = expected_demand[pair_item] + demand_during_lead_time - current_stock[pair_item]
+    room_below_max_stock = (max_stock - current_stock)[pair_item]
+    
+    pallets = np.floor_divide(np.minimum(room_below_max_stock, sellable_units), data['pair_upp'])
+    return np.maximum(pallets, 0).astype(np.int64)
+
+def calculate_pair_upper_bounds(data):
+    # Upper bound per (item_id, supplier_id), see _pair_upper_bound_array
+    return dict(zip(data['pairs'], _pair_upper_bound_array(data).tolist()))
+
 def create_optimization_model(data):
     # Create the model - we want to minimize cost
     model = pulp.LpProblem(name="Stock_Purchasing_Optimization", sense=pulp.LpMinimize)
     
-    # xij represents the number of pallets of item i ordered from supplier j
-    x = {}
-    for item_id, item_data in data['items'].items():
-        for supplier_id in data['available_suppliers'][item_id]:
-            x[(item_id, supplier_id)] = pulp.LpVariable(
-                name=f"x_{item_id}_{supplier_id}",
-                lowBound=0,
-                cat='Integer'  # Pallets must be whole numbers
-            )
+    # Pairs that can't take a single pallet are left out of the model entirely
+    pair_upper_bound = _pair_upper_bound_array(data)
+    kept = pair_upper_bound > 0
+    pairs = [pair for pair, keep in zip(data['pairs'], kept) if keep]
     
-    # Minimize total cost
-    model += pulp.lpSum(
-        x[(item_id, supplier_id)] * data['costs'][item_id][supplier_id]
-        for item_id in data['items']
-        for supplier_id in data['available_suppliers'][item_id]
-    ), "Total_Cost"
+    # xij represents the number of pallets of item i ordered from supplier j. Variables are named
+    # by their position in data['pairs'] (x_0, x_1, ...), which keeps the LP file CBC has to parse
+    # short; x maps each (item_id, supplier_id) to its variable.
+    # The upper bound also enforces the lead time and expiry rule, which otherwise
+    # needs its own constraint: x * units_per_pallet + current_stock <= sellable stock
+    # PuLP 3.3+ wants variables created through the problem (LpVariable(...) is deprecated there)
+    new_variable = getattr(model, 'add_variable', pulp.LpVariable)
+    variables = [
+        new_variable(
+            name=f"x_{pair_index}",
+            lowBound=0,
+            upBound=upper_bound,
+            cat='Integer'  # Pallets must be whole numbers
+        )
+        for pair_index, upper_bound in zip(np.flatnonzero(kept).tolist(), pair_upper_bound[kept].tolist())
+    ]
+    x = dict(zip(pairs, variables))
+    
+    # Objective coefficients, aligned with variables
+    costs = data['pair_cost'][kept].tolist()
+    
+    pruned_pairs = len(data['pairs']) - len(x)
+    if pruned_pairs:
+        # Suppliers left with no orderable item also lose their pallet constraints below
+        pruned_suppliers = {supplier_id for _, supplier_id in data['pairs']} - {supplier_id for _, supplier_id in x}
+        print(
+            f"Pruned {pruned_pairs} of {len(data['pairs'])} item-supplier pairs that can't be ordered "
+            f"({len(pruned_suppliers)} suppliers left with nothing to order)"
+        )
+    
+    # Minimize total cost, built in one go from the two aligned lists
+    model += pulp.LpAffineExpression(list(zip(x.values(), costs))), "Total_Cost"
         
     # 1. Stock Constraints
-    for item_id, item_data in data['items'].items():
-        # Minimum stock constraint: ensure we order enough to meet minimum stock requirements
-        model += (
-            pulp.lpSum(
-                x[(item_id, supplier_id)] * item_data['units_per_pallet']
-                for supplier_id in data['available_suppliers'][item_id]
-            ) + item_data['current_stock'] >= item_data['min_stock']
-        ), f"Min_Stock_{item_id}"
+    # Most units each item could receive, with every one of its variables at its upper bound
+    max_units_by_item = np.bincount(
+        data['pair_item'], weights=pair_upper_bound * data['pair_upp'], minlength=len(data['items'])
+    )
+    skipped_stock_constraints = 0
+    for row, (item_id, item_data) in enumerate(data['items'].items()):
+        units_per_pallet = item_data['units_per_pallet']
+        current_stock = item_data['current_stock']
+        supplier_ids = [
+            supplier_id for supplier_id in data['available_suppliers'][item_id]
+            if (item_id, supplier_id) in x
+        ]
         
-        # Maximum stock constraint: ensure we don't order more than maximum stock
-        model += (
-            pulp.lpSum(
-                x[(item_id, supplier_id)] * item_data['units_per_pallet']
-                for supplier_id in data['available_suppliers'][item_id]
-            ) + item_data['current_stock'] <= item_data['max_stock']
-        ), f"Max_Stock_{item_id}"
+        # Units ordered for this item, shared by the min and max stock constraints. The current stock
+        # goes on the right-hand side: comparing with a plain number keeps a reference to this one
+        # expression, where units_ordered + current_stock would copy it for each constraint.
+        units_ordered = pulp.LpAffineExpression([
+            (x[(item_id, supplier_id)], units_per_pallet)
+            for supplier_id in supplier_ids
+        ])
+        
+        # Minimum stock constraint: ensure we order enough to meet minimum stock requirements.
+        # Not needed when the current stock already meets it, as x >= 0.
+        if current_stock < item_data['min_stock']:
+            model += (
+                units_ordered >= item_data['min_stock'] - current_stock
+            ), f"Min_Stock_{item_id}"
+        else:
+            skipped_stock_constraints += 1
+        
+        # Maximum stock constraint: ensure we don't order more than maximum stock.
+        # Not needed when even ordering every variable's upper bound stays below it.
+        if current_stock + max_units_by_item[row] > item_data['max_stock']:
+            model += (
+                units_ordered <= item_data['max_stock'] - current_stock
+            ), f"Max_Stock_{item_id}"
+        else:
+            skipped_stock_constraints += 1
+    
+    if skipped_stock_constraints:
+        print(f"Skipped {skipped_stock_constraints} of {2 * len(data['items'])} stock constraints that can't be violated")
     
     # 2. Supplier Constraints
     for supplier_id, supplier_data in data['suppliers'].items():
-        # Get all items that can be supplied by this supplier
+        # Get all items that can still be ordered from this supplier
         items_for_supplier = [
-            item_id for item_id in data['items']
-            if supplier_id in data['available_suppliers'][item_id]
+            item_id for item_id in data['items_for_supplier'][supplier_id]
+            if (item_id, supplier_id) in x
         ]
         
         if items_for_supplier:  
+            # Pallets ordered from this supplier, shared by the min and max pallet constraints
+            pallets_ordered = pulp.LpAffineExpression([
+                (x[(item_id, supplier_id)], 1)
+                for item_id in items_for_supplier
+            ])
+            
             # Minimum pallets constraint: ensure we order at least the minimum required by the supplier
             model += (
-                pulp.lpSum(
-                    x[(item_id, supplier_id)]
-                    for item_id in items_for_supplier
-                ) >= supplier_data['min_pallets']
+                pallets_ordered >= supplier_data['min_pallets']
             ), f"Min_Pallets_{supplier_id}"
             
             # Maximum pallets constraint: ensure we don't order more than the maximum allowed by the supplier
             model += (
-                pulp.lpSum(
-                    x[(item_id, supplier_id)]
-                    for item_id in items_for_supplier
-                ) <= supplier_data['max_pallets']
+                pallets_ordered <= supplier_data['max_pallets']
             ), f"Max_Pallets_{supplier_id}"
-    
-    # 3. Lead Time and Expiry Constraint
-    for item_id, item_data in data['items'].items():
-        for supplier_id in data['available_suppliers'][item_id]:
-            supplier_data = data['suppliers'][supplier_id]
-            lead_time = supplier_data['lead_time']
-            
-            # Calculate expected demand during lead time
-            expected_demand_during_lead_time = item_data['average_daily_sale'] * lead_time
-            
-            # Current stock + ordered stock should not exceed expected demand before expiry
+        elif data['items_for_supplier'][supplier_id] and supplier_data['min_pallets'] > 0:
+            # Everything this supplier sells was pruned, so nothing can be ordered from it. Its
+            # minimum order still applies, so keep that row (0 >= min_pallets) and let the model
+            # come out infeasible, as it did before pruning.
             model += (
-                x[(item_id, supplier_id)] * item_data['units_per_pallet'] + item_data['current_stock'] 
-                <= item_data['expected_demand'] + expected_demand_during_lead_time
-            ), f"Lead_Time_Expiry_{item_id}_{supplier_id}"
+                pulp.LpAffineExpression() >= supplier_data['min_pallets']
+            ), f"Min_Pallets_{supplier_id}"
+    
+    # 3. Lead Time and Expiry Constraint: enforced by each variable's upper bound (see above)
+    
+    return model, x
+
+def _group_columns(groups, n_groups):
+    # Column indices belonging to each group, like the rows of a CSR matrix. One stable sort
+    # replaces a scan over every pair for every group.
+    order = np.argsort(groups, kind='stable')
+    bounds = np.searchsorted(groups[order], np.arange(n_groups + 1))
+    return [order[bounds[k]:bounds[k + 1]] for k in range(n_groups)]
+
+def create_optimization_model_mip(data):
+    # The same model as create_optimization_model, built with python-mip (optional dependency).
+    # mip keeps CBC loaded in-process and takes each row as variable/coefficient arrays, so
+    # there are no per-term Python expressions and no LP file for a CBC subprocess to parse.
+    try:
+        import mip
+    except ImportError as e:
+        raise ImportError("The mip backend needs python-mip: pip install mip") from e
+    
+    pair_upper_bound = _pair_upper_bound_array(data).astype(np.float64)
+    
+    # Pairs that can't take a single pallet are left out, and the columns are numbered 0..n-1
+    # over the rest. Every per-pair array below uses that numbering.
+    kept = pair_upper_bound > 0
+    pairs = [pair for pair, keep in zip(data['pairs'], kept) if keep]
+    pair_item = data['pair_item'][kept]
+    pair_supplier = data['pair_supplier'][kept]
+    pair_cost = data['pair_cost'][kept]
+    pair_units = data['pair_upp'][kept].astype(np.float64)
+    pair_upper_bound = pair_upper_bound[kept]
+    item_ids = data['item_ids'].tolist()
+    supplier_ids = data['supplier_ids'].tolist()
+    
+    model = mip.Model(name="Stock_Purchasing_Optimization", sense=mip.MINIMIZE, solver_name=mip.CBC)
+    model.verbose = 0
+    
+    # xij represents the number of pallets of item i ordered from supplier j; the upper bound
+    # also enforces the lead time and expiry rule (see _pair_upper_bound_array)
+    variables = [
+        model.add_var(name=f"x_{pair_index}", lb=0, ub=upper_bound, var_type=mip.INTEGER)
+        for pair_index, upper_bound in zip(np.flatnonzero(kept).tolist(), pair_upper_bound)
+    ]
+    x = dict(zip(pairs, variables))
+    
+    # Minimize total cost
+    model.objective = mip.minimize(mip.LinExpr(variables, pair_cost.tolist()))
+    
+    # CBC crashes on rows without variables, and mip won't solve a model with no variables at
+    # all. Both get a placeholder column fixed at 0, created on first use, so such a row stays a
+    # plain infeasible row that solve_model reports like the other backends.
+    no_order = []
+    def nothing_ordered():
+        if not no_order:
+            no_order.append(model.add_var(name="no_order", lb=0, ub=0))
+        return mip.LinExpr(no_order, [1.0])
+    
+    # 1. Stock Constraints: one row per item over that item's pairs, coefficient units_per_pallet.
+    # Rows that can't be violated are skipped, as in create_optimization_model.
+    skipped_stock_constraints = 0
+    for row, columns in enumerate(_group_columns(pair_item, len(item_ids))):
+        item_id = item_ids[row]
+        item_data = data['items'][item_id]
+        current_stock = item_data['current_stock']
+        max_units_ordered = pair_units[columns] @ pair_upper_bound[columns]
+        needs_min_row = current_stock < item_data['min_stock']
+        needs_max_row = current_stock + max_units_ordered > item_data['max_stock']
+        skipped_stock_constraints += (not needs_min_row) + (not needs_max_row)
+        
+        if len(columns) == 0:
+            if not (needs_min_row or needs_max_row):
+                continue
+            # Nothing can be ordered for this item, so a row still needed here can never hold
+            units_ordered = nothing_ordered()
+        else:
+            units_ordered = mip.LinExpr([variables[column] for column in columns], pair_units[columns].tolist())
+        
+        if needs_min_row:
+            model.add_constr(units_ordered >= item_data['min_stock'] - current_stock, name=f"Min_Stock_{item_id}")
+        if needs_max_row:
+            model.add_constr(units_ordered <= item_data['max_stock'] - current_stock, name=f"Max_Stock_{item_id}")
+    
+    if skipped_stock_constraints:
+        print(f"Skipped {skipped_stock_constraints} of {2 * len(item_ids)} stock constraints that can't be violated")
+    
+    # 2. Supplier Constraints: one row per supplier that still has orderable items, coefficient 1
+    for row, columns in enumerate(_group_columns(pair_supplier, len(supplier_ids))):
+        supplier_id = supplier_ids[row]
+        supplier_data = data['suppliers'][supplier_id]
+        
+        if len(columns) == 0:
+            # A supplier whose pairs were all pruned keeps its minimum order, as in
+            # create_optimization_model
+            if data['items_for_supplier'][supplier_id] and supplier_data['min_pallets'] > 0:
+                model.add_constr(nothing_ordered() >= supplier_data['min_pallets'], name=f"Min_Pallets_{supplier_id}")
+            continue
+        
+        pallets_ordered = mip.LinExpr([variables[column] for column in columns], [1.0] * len(columns))
+        model.add_constr(pallets_ordered >= supplier_data['min_pallets'], name=f"Min_Pallets_{supplier_id}")
+        model.add_constr(pallets_ordered <= supplier_data['max_pallets'], name=f"Max_Pallets_{supplier_id}")
+    
+    # Every pair was pruned and no row needed the placeholder: the model is still solvable
+    # (the empty plan), it just needs a column
+    if model.num_cols == 0:
+        nothing_ordered()
     
     return model, x
 
-def solve_model(model, x, data):
+# One CBC wrapper per (warm start, threads) setting, created on first use and shared by every solve
+_solvers = {}
+
+def _get_solver(warm_start, threads=None):
+    if (warm_start, threads) not in _solvers:
+        _solvers[(warm_start, threads)] = pulp.PULP_CBC_CMD(msg=False, warmStart=warm_start, threads=threads)
+    return _solvers[(warm_start, threads)]
+
+def _solve_pulp(model, x, pairs, warm_from, threads):
+    # warm_from is a previous plan from extract_warm_state, handed to CBC as a MIP start so
+    # re-solving a slightly changed problem doesn't begin branch-and-bound from scratch
+    if warm_from:
+        for key, var in x.items():
+            # Pairs that didn't exist in the previous solve simply get no starting value
+            if warm_from.get(key) is not None:
+                var.setInitialValue(warm_from[key])
+    
     # Solve the model
-    solver = pulp.PULP_CBC_CMD(msg=False)
-    model.solve(solver)
+    model.solve(_get_solver(warm_start=bool(warm_from), threads=threads))
     
     # Check if the model was solved successfully
     if model.status != pulp.LpStatusOptimal:
@@ -96,57 +290,197 @@ def solve_model(model, x, data):
             print("The model is infeasible. Please check the constraints.")
         return None, None
     
-    # Extract results
-    results = []
-    for item_id in data['items']:
-        for supplier_id in data['available_suppliers'][item_id]:
-            if (item_id, supplier_id) in x:
-                pallets_ordered = x[(item_id, supplier_id)].value()
-                if pallets_ordered and pallets_ordered > 0:
-                    units_ordered = pallets_ordered * data['items'][item_id]['units_per_pallet']
-                    cost = pallets_ordered * data['costs'][item_id][supplier_id]
-                    results.append({
-                        'ItemID': item_id,
-                        'ItemName': data['items'][item_id]['name'],
-                        'SupplierID': supplier_id,
-                        'SupplierName': data['suppliers'][supplier_id]['name'],
-                        'PalletsOrdered': int(pallets_ordered),
-                        'UnitsOrdered': int(units_ordered),
-                        'CostPerPallet': data['costs'][item_id][supplier_id],
-                        'TotalCost': cost
-                    })
-    
-    # Create a DataFrame from the results
-    results_df = pd.DataFrame(results)
-    
-    # Calculate total cost
-    total_cost = model.objective.value()
+    # Pallets for every pair in data['pairs'] order, 0 for pairs left out of the model
+    pallets = np.fromiter(
+        ((x[pair].value() or 0.0) if pair in x else 0.0 for pair in pairs), dtype=np.float64, count=len(pairs)
+    )
+    # An empty objective (nothing left to order) has no value rather than 0
+    return pallets, model.objective.value() or 0.0
+
+# python-mip statuses in PuLP's terms, so every backend reports a failed solve the same way
+_MIP_STATUSES = {
+    'OPTIMAL': pulp.LpStatusOptimal,
+    'INFEASIBLE': pulp.LpStatusInfeasible,
+    'INT_INFEASIBLE': pulp.LpStatusInfeasible,
+    'UNBOUNDED': pulp.LpStatusUnbounded,
+    'NO_SOLUTION_FOUND': pulp.LpStatusNotSolved
+}
+
+def _solve_mip(model, x, pairs, warm_from, threads):
+    # Models from create_optimization_model_mip solve in-process, with no CBC subprocess to start
+    if threads is not None:
+        model.threads = threads
+    
+    if warm_from:
+        model.start = [(var, warm_from[key]) for key, var in x.items() if warm_from.get(key) is not None]
+    
+    status = _MIP_STATUSES.get(model.optimize().name, pulp.LpStatusUndefined)
+    if status != pulp.LpStatusOptimal:
+        print(f"Model status: {pulp.LpStatus[status]}")
+        if status == pulp.LpStatusInfeasible:
+            print("The model is infeasible. Please check the constraints.")
+        return None, None
+    
+    pallets = np.fromiter(
+        ((x[pair].x or 0.0) if pair in x else 0.0 for pair in pairs), dtype=np.float64, count=len(pairs)
+    )
+    # An empty objective (nothing left to order) has no value rather than 0
+    return pallets, model.objective_value or 0.0
+
+# Model last written to each MPS path, so write_mps_once knows when a file can be reused
+_mps_models = weakref.WeakValueDictionary()
+
+def write_mps_once(model, path):
+    # Write the model as an MPS file for solve_model(backend='cbc_mps'). Solving the same model
+    # again reuses the file instead of serializing the whole model every time. A model changed
+    # after it was written needs a new path (or the file removed) to be picked up.
+    path = Path(path)
+    if _mps_models.get(path) is not model or not path.exists():
+        model.writeMPS(str(path))
+        _mps_models[path] = model
+    return path
+
+# First word of CBC's solution file status line in PuLP's terms ("Integer infeasible" included)
+_CBC_STATUSES = {
+    'Optimal': pulp.LpStatusOptimal,
+    'Infeasible': pulp.LpStatusInfeasible,
+    'Integer': pulp.LpStatusInfeasible,
+    'Unbounded': pulp.LpStatusUnbounded,
+    'Stopped': pulp.LpStatusNotSolved
+}
+
+def _solve_cbc_mps(model, x, pairs, warm_from, threads, mps_path):
+    # Run the CBC binary that ships with PuLP directly on the MPS file from write_mps_once
+    mps_path = write_mps_once(model, mps_path)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        solution_path = Path(tmp_dir) / "solution.txt"
+        command = [_get_solver(warm_start=False).path, str(mps_path)]
+        
+        if warm_from:
+            # A mipstart file has the same layout as CBC's solution files; CBC matches columns by name
+            mipstart_path = Path(tmp_dir) / "mipstart.mst"
+            with open(mipstart_path, 'w') as f:
+                f.write("Stopped on iterations - objective value 0.00000000\n")
+                for column, (key, var) in enumerate(x.items()):
+                    if warm_from.get(key) is not None:
+                        f.write(f"{column} {var.name} {warm_from[key]}\n")
+            command += ['-mips', str(mipstart_path)]
+        
+        if threads is not None:
+            command += ['-threads', str(threads)]
+        command += ['-solve', '-solution', str(solution_path)]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        
+        # The first line is e.g. "Optimal - objective value 26665.00000000", then one line per column
+        with open(solution_path) as f:
+            status = f.readline().strip()
+            values = {}
+            for line in f:
+                fields = line.split()
+                if fields[0] == '**':  # CBC marks values outside their bounds
+                    fields = fields[1:]
+                values[fields[1]] = float(fields[2])
+    
+    # Record the outcome on the model, as model.solve does for the pulp backend
+    model.assignStatus(_CBC_STATUSES.get(status.split()[0], pulp.LpStatusUndefined))
+    if model.status != pulp.LpStatusOptimal:
+        print(f"Model status: {pulp.LpStatus[model.status]}")
+        if model.status == pulp.LpStatusInfeasible:
+            print("The model is infeasible. Please check the constraints.")
+        return None, None
+    
+    # Store the values on the variables too, so extract_warm_state works as after model.solve
+    for var in x.values():
+        var.varValue = values.get(var.name, 0.0)
+    
+    pallets = np.fromiter(
+        ((x[pair].varValue or 0.0) if pair in x else 0.0 for pair in pairs), dtype=np.float64, count=len(pairs)
+    )
+    return pallets, float(status.rsplit(' ', 1)[1])
+
+def solve_model(model, x, data, warm_from=None, backend='pulp', threads=None, mps_path=None):
+    # backend is 'pulp' for create_optimization_model or 'mip' for create_optimization_model_mip.
+    # 'cbc_mps' also takes a create_optimization_model model, but solves it from the MPS file at
+    # mps_path (see write_mps_once) by running CBC directly.
+    # threads lets CBC run branch-and-bound on several threads (None keeps CBC's default).
+    if backend == 'pulp':
+        pallets, total_cost = _solve_pulp(model, x, data['pairs'], warm_from, threads)
+    elif backend == 'mip':
+        pallets, total_cost = _solve_mip(model, x, data['pairs'], warm_from, threads)
+    elif backend == 'cbc_mps':
+        if mps_path is None:
+            raise ValueError("The cbc_mps backend needs an mps_path")
+        pallets, total_cost = _solve_cbc_mps(model, x, data['pairs'], warm_from, threads, mps_path)
+    else:
+        raise ValueError(f"Unknown solver backend: {backend}")
+    
+    if pallets is None:
+        return None, None
+    
+    # Extract results column-wise: the solved values line up with the flat pair arrays, so
+    # everything else is NumPy indexing. Only keep the pairs we actually order from.
+    ordered = pallets > 0
+    pallets = pallets[ordered]
+    pair_item = data['pair_item'][ordered]
+    pair_supplier = data['pair_supplier'][ordered]
+    item_ids = data['item_ids'][pair_item]
+    supplier_ids = data['supplier_ids'][pair_supplier]
+    units_per_pallet = data['pair_upp'][ordered]
+    cost_per_pallet = data['pair_cost'][ordered]
+    
+    item_names = np.array([item_data['name'] for item_data in data['items'].values()], dtype=object)
+    supplier_names = np.array([supplier_data['name'] for supplier_data in data['suppliers'].values()], dtype=object)
+    
+    # Create a DataFrame from the result columns
+    results_df = pd.DataFrame({
+        'ItemID': item_ids,
+        'ItemName': item_names[pair_item],
+        'SupplierID': supplier_ids,
+        'SupplierName': supplier_names[pair_supplier],
+        # Solver values can be a hair off integral, so round rather than truncate
+        'PalletsOrdered': np.rint(pallets).astype(np.int64),
+        'UnitsOrdered': np.rint(pallets * units_per_pallet).astype(np.int64),
+        'CostPerPallet': cost_per_pallet,
+        'TotalCost': pallets * cost_per_pallet
+    })
     
     return results_df, total_cost
 
+def extract_warm_state(x):
+    # Pallets per (item_id, supplier_id) from the last solve, to pass back in as solve_model(warm_from=...)
+    values = {key: var.value() if hasattr(var, 'value') else var.x for key, var in x.items()}
+    return {key: value for key, value in values.items() if value is not None}
+
 def save_results(results_df, total_cost, output_file=None):
     if output_file is None:
         output_file = Path("optimal_purchasing_plan.csv")
     
-    # Save results to CSV
-    results_df.to_csv(output_file, index=False)
+    # Save results to CSV, streaming the rows straight from the result columns
+    columns = results_df.columns.tolist()
+    with open(output_file, 'w', newline='') as f:
+        # Same line endings as DataFrame.to_csv (csv.writer would default to \r\n)
+        writer = csv.writer(f, lineterminator=os.linesep)
+        writer.writerow(columns)
+        writer.writerows(zip(*(results_df[column].tolist() for column in columns)))
     print(f"Optimal purchasing plan saved to {output_file}")
     print(f"Total cost: ${total_cost:.2f}")
     
+    pallets = results_df['PalletsOrdered'].to_numpy()
+    
     # Display summary
     print("\nSummary of Optimal Purchasing Plan:")
     print(f"Total items to order: {len(results_df)}")
-    print(f"Total pallets to order: {results_df['PalletsOrdered'].sum()}")
-    print(f"Total units to order: {results_df['UnitsOrdered'].sum()}")
+    print(f"Total pallets to order: {pallets.sum()}")
+    print(f"Total units to order: {results_df['UnitsOrdered'].to_numpy().sum()}")
     
     # Group by supplier and show summary
-    supplier_summary = results_df.groupby('SupplierID').agg({
-        'PalletsOrdered': 'sum',
-        'TotalCost': 'sum'
-    }).reset_index()
+    supplier_ids, supplier_rows = np.unique(results_df['SupplierID'].to_numpy(), return_inverse=True)
+    supplier_pallets = np.bincount(supplier_rows, minlength=len(supplier_ids), weights=pallets).astype(np.int64)
+    supplier_costs = np.bincount(supplier_rows, minlength=len(supplier_ids), weights=results_df['TotalCost'].to_numpy())
     
     print("\nOrders by Supplier:")
-    for _, row in supplier_summary.iterrows():
-        print(f"Supplier {row['SupplierID']}: {row['PalletsOrdered']} pallets, ${row['TotalCost']:.2f}")
+    for supplier_id, supplier_pallet_count, supplier_cost in zip(supplier_ids, supplier_pallets, supplier_costs):
+        print(f"Supplier {supplier_id}: {supplier_pallet_count} pallets, ${supplier_cost:.2f}")
     
     return str(output_file)
@@ -1,6 +1,74 @@
+import functools
+from collections import OrderedDict
+from copy import deepcopy
+
 import pandas as pd
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, the array helpers below just run as plain NumPy without it
+    njit = None
+
+# Source column -> key used in data['items'] / data['suppliers']
+ITEM_FIELDS = {
+    'Name': 'name',
+    'CurrentStock': 'current_stock',
+    'MinStock': 'min_stock',
+    'MaxStock': 'max_stock',
+    'Expiry (days)': 'expiry_days',
+    'AverageDailySale': 'average_daily_sale',
+    'expected_demand': 'expected_demand',
+    'units_per_pallet': 'units_per_pallet'
+}
+
+SUPPLIER_FIELDS = {
+    'Name': 'name',
+    'MinPallets': 'min_pallets',
+    'MaxPallets': 'max_pallets',
+    'LeadTime (days)': 'lead_time'
+}
+
+def _frame_key(df):
+    # Content hash of a DataFrame (values and index) plus its columns and dtypes
+    return (
+        tuple(df.columns),
+        tuple(str(dtype) for dtype in df.dtypes),
+        pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()
+    )
+
+def _has_missing_text(df):
+    # Missing values in text columns don't hash reliably apart from each other
+    return bool(df.select_dtypes(include=['object', 'string']).isna().to_numpy().any())
+
+def _memoize_frames(maxsize=8):
+    # LRU cache for pure functions of DataFrames, keyed on the frames' contents. Hits hand out the
+    # cached result itself, so callers must treat it as read-only; pass copy=True for a private
+    # deep copy (which costs about as much as recomputing for large inputs).
+    def decorator(func):
+        cache = OrderedDict()
+        
+        @functools.wraps(func)
+        def wrapper(*frames, copy=False):
+            if any(_has_missing_text(df) for df in frames):
+                return func(*frames)
+            
+            key = tuple(_frame_key(df) for df in frames)
+            if key in cache:
+                cache.move_to_end(key)
+                return deepcopy(cache[key]) if copy else cache[key]
+            
+            result = func(*frames)
+            cache[key] = result
+            if len(cache) > maxsize:
+                cache.popitem(last=False)
+            return deepcopy(result) if copy else result
+        
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
+
 def convert_units_to_pallets(quantity, units_per_pallet=24):
     return quantity / units_per_pallet
 
@@ -11,53 +79,100 @@ def calculate_expected_demand(item_row, days_to_consider):
     daily_sale = item_row['AverageDailySale']
     return daily_sale * days_to_consider
 
+def _expected_demand_vec(daily_sales, days_to_consider):
+    return daily_sales * days_to_consider
+
+if njit is not None:
+    _expected_demand_vec = njit(cache=True)(_expected_demand_vec)
+
+def calculate_expected_demand_vec(daily_sales, days_to_consider):
+    # calculate_expected_demand over whole columns (array-likes), compiled when numba is installed.
+    # Integers are widened to int64 so sales * days can't overflow a 32-bit column.
+    daily_sales = np.asarray(daily_sales)
+    days_to_consider = np.asarray(days_to_consider)
+    return _expected_demand_vec(
+        daily_sales.astype(np.result_type(daily_sales.dtype, np.int64)),
+        days_to_consider.astype(np.result_type(days_to_consider.dtype, np.int64))
+    )
+
+@_memoize_frames(maxsize=8)
 def prepare_data_for_optimization(items_df, suppliers_df, pricing_df):
+    # Results are cached and shared between callers: treat the returned dict as read-only, or
+    # call with copy=True to get one that can be modified
     # Create a dictionary to store all the data needed for optimization
     data = {
         'items': {},
         'suppliers': {},
         'available_suppliers': {},
+        'items_for_supplier': {},
         'costs': {}
     }
     
-    # Process item data
-    for _, item in items_df.iterrows():
-        item_id = item['ItemID']
+    # Process item data (one columnar conversion instead of a Python Series per row)
+    items = items_df.assign(
         # Calculate expected demand before expiry
-        expiry_days = item['Expiry (days)']
-        expected_demand = calculate_expected_demand(item, expiry_days)
-        
-        data['items'][item_id] = {
-            'name': item['Name'],
-            'current_stock': item['CurrentStock'],
-            'min_stock': item['MinStock'],
-            'max_stock': item['MaxStock'],
-            'expiry_days': expiry_days,
-            'average_daily_sale': item['AverageDailySale'],
-            'expected_demand': expected_demand,
-            'units_per_pallet': 24  # As per the task description
-        }
+        expected_demand=calculate_expected_demand_vec(
+            items_df['AverageDailySale'].to_numpy(), items_df['Expiry (days)'].to_numpy()
+        ),
+        units_per_pallet=24  # As per the task description
+    ).set_index('ItemID')
+    data['items'] = items[list(ITEM_FIELDS)].rename(columns=ITEM_FIELDS).to_dict(orient='index')
     
     # Process supplier data
-    for _, supplier in suppliers_df.iterrows():
-        supplier_id = supplier['SupplierID']
-        data['suppliers'][supplier_id] = {
-            'name': supplier['Name'],
-            'min_pallets': supplier['MinPallets'],
-            'max_pallets': supplier['MaxPallets'],
-            'lead_time': supplier['LeadTime (days)']
-        }
-    
-    # Process pricing data and determine available suppliers for each item
-    for item_id in data['items'].keys():
-        # Get available suppliers for this item
-        item_pricing = pricing_df[pricing_df['ItemID'] == item_id]
-        data['available_suppliers'][item_id] = item_pricing['SupplierID'].unique().tolist()
-        
-        # Store costs for each item-supplier combination
+    suppliers = suppliers_df.set_index('SupplierID')
+    data['suppliers'] = suppliers[list(SUPPLIER_FIELDS)].rename(columns=SUPPLIER_FIELDS).to_dict(orient='index')
+    
+    # Determine available suppliers for each item with a single groupby over the pricing data
+    suppliers_by_item = pricing_df.groupby('ItemID', sort=False)['SupplierID'].unique()
+    for item_id in data['items']:
+        if item_id in suppliers_by_item.index:
+            data['available_suppliers'][item_id] = suppliers_by_item[item_id].tolist()
+        else:
+            data['available_suppliers'][item_id] = []
         data['costs'][item_id] = {}
-        for _, row in item_pricing.iterrows():
-            supplier_id = row['SupplierID']
-            data['costs'][item_id][supplier_id] = row['CostPerPallet']
+    
+    # And the inverse mapping, so supplier constraints don't have to scan every item
+    items_by_supplier = pricing_df.groupby('SupplierID', sort=False)['ItemID'].unique()
+    for supplier_id in data['suppliers']:
+        if supplier_id in items_by_supplier.index:
+            data['items_for_supplier'][supplier_id] = items_by_supplier[supplier_id].tolist()
+        else:
+            data['items_for_supplier'][supplier_id] = []
+    
+    # Store costs for each item-supplier combination
+    item_supplier_costs = pricing_df.set_index(['ItemID', 'SupplierID'])['CostPerPallet'].to_dict()
+    for (item_id, supplier_id), cost in item_supplier_costs.items():
+        if item_id in data['costs']:
+            data['costs'][item_id][supplier_id] = cost
+    
+    # The same pairs flattened: one (item_id, supplier_id) -> cost dict, plus parallel arrays in
+    # the same order that the model builders and result extraction walk instead of nested dicts
+    data['pairs'] = [
+        (item_id, supplier_id)
+        for item_id, supplier_ids in data['available_suppliers'].items()
+        for supplier_id in supplier_ids
+    ]
+    data['costs_flat'] = {
+        (item_id, supplier_id): data['costs'][item_id][supplier_id] for item_id, supplier_id in data['pairs']
+    }
+    
+    # pair_item and pair_supplier index into these ID tables
+    data['item_ids'] = np.array(list(data['items']), dtype=np.int64)
+    data['supplier_ids'] = np.array(list(data['suppliers']), dtype=np.int64)
+    item_index = {item_id: row for row, item_id in enumerate(data['items'])}
+    supplier_index = {supplier_id: row for row, supplier_id in enumerate(data['suppliers'])}
+    
+    n_pairs = len(data['pairs'])
+    data['pair_item'] = np.fromiter((item_index[item_id] for item_id, _ in data['pairs']), dtype=np.int64, count=n_pairs)
+    data['pair_supplier'] = np.fromiter(
+        (supplier_index[supplier_id] for _, supplier_id in data['pairs']), dtype=np.int64, count=n_pairs
+    )
+    data['pair_cost'] = np.fromiter(data['costs_flat'].values(), dtype=np.float64, count=n_pairs)
+    units_per_pallet = np.array([item_data['units_per_pallet'] for item_data in data['items'].values()], dtype=np.int64)
+    data['pair_upp'] = units_per_pallet[data['pair_item']]
+    
+    # The result is shared through the cache, so make accidental writes to the arrays fail loudly
+    for key in ('item_ids', 'supplier_ids', 'pair_item', 'pair_supplier', 'pair_cost', 'pair_upp'):
+        data[key].flags.writeable = False
     
     return data
@@ -0,0 +1,46 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.loader import load_item_data, load_supplier_data, load_pricing_data
+from src.utils.preprocessing import prepare_data_for_optimization
+from src.models.optimizer import create_optimization_model, create_optimization_model_mip, solve_model
+
+def _solve_source_data(backend, threads=None):
+    # The loaders and prepare_data_for_optimization are cached, so each call only pays for its solve
+    data = prepare_data_for_optimization(load_item_data(), load_supplier_data(), load_pricing_data())
+    if backend == 'mip':
+        model, x = create_optimization_model_mip(data)
+    else:
+        model, x = create_optimization_model(data)
+    results_df, total_cost = solve_model(model, x, data, backend=backend, threads=threads)
+    return {'data': data, 'model': model, 'x': x, 'results_df': results_df, 'total_cost': total_cost}
+
+@pytest.fixture(scope="session")
+def source_solutions():
+    # Every solve of the Source data the tests need, run side by side. A thread pool is enough:
+    # PuLP's CBC is a subprocess and python-mip calls into CBC without holding the GIL.
+    configurations = {
+        'pulp': ('pulp', None),
+        'pulp_threaded': ('pulp', os.cpu_count())
+    }
+    try:
+        import mip  # noqa: F401
+        configurations['mip'] = ('mip', None)
+    except ImportError:
+        pass
+    
+    # Load once up front so the workers don't all fill the same caches at the same time
+    prepare_data_for_optimization(load_item_data(), load_supplier_data(), load_pricing_data())
+    
+    with ThreadPoolExecutor(max_workers=len(configurations)) as executor:
+        futures = {
+            name: executor.submit(_solve_source_data, backend, threads)
+            for name, (backend, threads) in configurations.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
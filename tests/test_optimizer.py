@@ -1,4 +1,5 @@
 import pytest
+import pulp
 import pandas as pd
 import numpy as np
 import os
@@ -8,9 +9,16 @@ from pathlib import Path
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from src.data import loader
 from src.data.loader import load_item_data, load_supplier_data, load_pricing_data
-from src.utils.preprocessing import prepare_data_for_optimization, convert_units_to_pallets, convert_pallets_to_units
-from src.models.optimizer import create_optimization_model, solve_model
+from src.utils.preprocessing import (
+    prepare_data_for_optimization, convert_units_to_pallets, convert_pallets_to_units,
+    calculate_expected_demand, calculate_expected_demand_vec
+)
+from src.models.optimizer import (
+    create_optimization_model, create_optimization_model_mip, solve_model, extract_warm_state, calculate_pair_upper_bounds,
+    save_results, write_mps_once
+)
 
 # Test data loading
 def test_data_loading():
@@ -26,6 +34,36 @@ def test_data_loading():
     assert 'SupplierID' in suppliers_df.columns
     assert 'CostPerPallet' in pricing_df.columns
 
+# Test that prices with cents load exactly
+def test_pricing_keeps_cents(tmp_path, monkeypatch):
+    monkeypatch.setattr(loader, 'CACHE_DIR', tmp_path / "cache")
+    csv_path = tmp_path / "pricing.csv"
+    csv_path.write_text("SupplierID,ItemID,CostPerPallet\n1,1,499.99\n1,2,1234.57\n")
+    
+    pricing_df = loader._read_source_file(csv_path, csv_path.stat().st_mtime, tuple(loader.PRICING_DTYPES.items()))
+    assert pricing_df['CostPerPallet'].tolist() == [499.99, 1234.57]
+    
+    # Without a schema only the integer columns are shrunk
+    pricing_df = loader._read_source_file(csv_path, csv_path.stat().st_mtime, None)
+    assert pricing_df['CostPerPallet'].tolist() == [499.99, 1234.57]
+    assert pricing_df['SupplierID'].dtype == 'int32'
+
+# Test that a corrupt parquet cache falls back to the CSV and gets rewritten
+def test_corrupt_parquet_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(loader, 'CACHE_DIR', tmp_path / "cache")
+    csv_path = tmp_path / "pricing.csv"
+    csv_path.write_text("SupplierID,ItemID,CostPerPallet\n1,1,500\n")
+    dtypes = tuple(loader.PRICING_DTYPES.items())
+    
+    cache_path = loader._parquet_cache_path(csv_path, dtypes)
+    cache_path.parent.mkdir()
+    cache_path.write_bytes(b"PAR1 truncated")
+    
+    pricing_df = loader._read_source_file(csv_path, csv_path.stat().st_mtime, dtypes)
+    assert pricing_df['CostPerPallet'].tolist() == [500.0]
+    pd.testing.assert_frame_equal(pd.read_parquet(cache_path), pricing_df)
+    assert list(cache_path.parent.glob("*.tmp")) == []
+
 # Test unit conversion functions
 def test_unit_conversion():
     assert convert_units_to_pallets(24) == 1.0
@@ -36,6 +74,17 @@ def test_unit_conversion():
     assert convert_pallets_to_units(2.5) == 60
     assert convert_pallets_to_units(0.5) == 12
 
+# Test that the array version of expected demand matches the per-item one
+def test_expected_demand_vec():
+    items_df = load_item_data()
+    
+    expected_demand = calculate_expected_demand_vec(items_df['AverageDailySale'], items_df['Expiry (days)'])
+    for row, (_, item_row) in enumerate(items_df.iterrows()):
+        assert expected_demand[row] == calculate_expected_demand(item_row, item_row['Expiry (days)'])
+    
+    assert calculate_expected_demand_vec(np.array([2**30], dtype=np.int32), np.array([4], dtype=np.int32))[0] == 2**32
+    assert calculate_expected_demand_vec([1.5, 2.0], [2, 3]).tolist() == [3.0, 6.0]
+
 # Test data preprocessing
 def test_data_preprocessing():
     items_df = load_item_data()
@@ -55,13 +104,43 @@ def test_data_preprocessing():
     # Check that all suppliers are included
     assert len(data['suppliers']) == len(suppliers_df)
     
-    # Check that costs are properly mapped
-    for _, row in pricing_df.iterrows():
-        item_id = row['ItemID']
-        supplier_id = row['SupplierID']
-        cost = row['CostPerPallet']
-        assert supplier_id in data['costs'].get(item_id, {})
-        assert data['costs'][item_id][supplier_id] == cost
+    # Check that costs are properly mapped, comparing the whole pricing table in one go
+    costs_series = pricing_df.set_index(['ItemID', 'SupplierID'])['CostPerPallet']
+    mapped_costs = pd.Series(data['costs_flat'])
+    pd.testing.assert_series_equal(
+        costs_series.sort_index(), mapped_costs.sort_index(),
+        check_dtype=False, check_index_type=False, check_names=False
+    )
+    
+    # Check that items_for_supplier is the inverse of available_suppliers
+    assert set(data['items_for_supplier']) == set(data['suppliers'])
+    for supplier_id, item_ids in data['items_for_supplier'].items():
+        for item_id in item_ids:
+            assert supplier_id in data['available_suppliers'][item_id]
+    assert sum(map(len, data['items_for_supplier'].values())) == sum(map(len, data['available_suppliers'].values()))
+    
+    # Check that the flat pair arrays line up with the pairs they describe
+    assert list(data['costs_flat']) == data['pairs']
+    assert data['item_ids'][data['pair_item']].tolist() == [item_id for item_id, _ in data['pairs']]
+    assert data['supplier_ids'][data['pair_supplier']].tolist() == [supplier_id for _, supplier_id in data['pairs']]
+    assert data['pair_cost'].tolist() == list(data['costs_flat'].values())
+    assert (data['pair_upp'] == 24).all()
+
+# Test that repeated preprocessing of the same frames shares one cached, read-only result
+def test_data_preprocessing_cache():
+    items_df = load_item_data()
+    suppliers_df = load_supplier_data()
+    pricing_df = load_pricing_data()
+    
+    data = prepare_data_for_optimization(items_df, suppliers_df, pricing_df)
+    assert prepare_data_for_optimization(items_df.copy(), suppliers_df, pricing_df) is data
+    with pytest.raises(ValueError):
+        data['pair_cost'][0] = 0
+    
+    private_data = prepare_data_for_optimization(items_df, suppliers_df, pricing_df, copy=True)
+    assert private_data is not data
+    assert private_data['items'] == data['items']
+    assert private_data['items'] is not data['items']
 
 # Test optimization model creation
 def test_model_creation():
@@ -75,10 +154,22 @@ def test_model_creation():
     assert model is not None
     assert x is not None
     
-    # Check that decision variables are created for each item-supplier combination
+    # Check that decision variables are created for each item-supplier combination that can be ordered
+    upper_bounds = calculate_pair_upper_bounds(data)
     for item_id in data['items']:
         for supplier_id in data['available_suppliers'].get(item_id, []):
-            assert (item_id, supplier_id) in x
+            assert ((item_id, supplier_id) in x) == (upper_bounds[(item_id, supplier_id)] > 0)
+    
+    # Check that an item's min and max stock constraints are over the same units ordered, with the
+    # current stock moved to the right-hand side (constant == -rhs on PuLP 2 and 3 alike)
+    for item_id, item_data in data['items'].items():
+        min_name, max_name = f"Min_Stock_{item_id}", f"Max_Stock_{item_id}"
+        if min_name in model.constraints and max_name in model.constraints:
+            min_constraint = model.constraints[min_name]
+            max_constraint = model.constraints[max_name]
+            assert dict(min_constraint.items()) == dict(max_constraint.items())
+            assert -min_constraint.constant == item_data['min_stock'] - item_data['current_stock']
+            assert -max_constraint.constant == item_data['max_stock'] - item_data['current_stock']
 
 # Test a simple optimization scenario
 def test_simple_optimization():
@@ -119,58 +210,261 @@ def test_simple_optimization():
     assert total_cost > 0
     
     # Check that minimum stock constraints are satisfied
+    by_item = results_df.groupby('ItemID')['UnitsOrdered'].sum().to_dict()
     for item_id in data['items']:
-        item_orders = results_df[results_df['ItemID'] == item_id]
-        total_ordered = item_orders['UnitsOrdered'].sum() if not item_orders.empty else 0
+        total_ordered = by_item.get(item_id, 0)
         current_stock = data['items'][item_id]['current_stock']
         min_stock = data['items'][item_id]['min_stock']
         
         assert current_stock + total_ordered >= min_stock
 
-# Test that the optimization respects supplier constraints
-def test_supplier_constraints():
-    items_df = load_item_data()
-    suppliers_df = load_supplier_data()
-    pricing_df = load_pricing_data()
+# Test that pairs which can't take a single pallet are pruned from the model
+def test_pair_pruning():
+    items_data = {
+        'ItemID': [1, 2],
+        'Name': ['Item A', 'Item B'],
+        'MinStock': [10, 20],
+        'MaxStock': [100, 40],
+        'Expiry (days)': [60, 40],
+        'CurrentStock': [5, 30],
+        'AverageDailySale': [1, 2]
+    }
+    
+    suppliers_data = {
+        'SupplierID': [1, 2],
+        'Name': ['Supplier A', 'Supplier B'],
+        'MinPallets': [1, 0],
+        'MaxPallets': [50, 100],
+        'LeadTime (days)': [3, 5]
+    }
+    
+    pricing_data = {
+        'SupplierID': [1, 1, 2],
+        'ItemID': [1, 2, 2],
+        'CostPerPallet': [100, 120, 105]
+    }
+    
+    data = prepare_data_for_optimization(
+        pd.DataFrame(items_data), pd.DataFrame(suppliers_data), pd.DataFrame(pricing_data)
+    )
+    upper_bounds = calculate_pair_upper_bounds(data)
+    
+    # Item B only has room for 10 more units, less than one pallet
+    assert upper_bounds[(2, 1)] == 0
+    assert upper_bounds[(2, 2)] == 0
+    # Item A is capped by what sells before expiry: 60 + 3 days of sales - 5 in stock = 58 units
+    assert upper_bounds[(1, 1)] == 2
     
-    data = prepare_data_for_optimization(items_df, suppliers_df, pricing_df)
     model, x = create_optimization_model(data)
-    results_df, total_cost = solve_model(model, x, data)
+    assert set(x) == {(1, 1)}
+    assert x[(1, 1)].upBound == 2
+    assert x[(1, 1)].name == f"x_{data['pairs'].index((1, 1))}"
+    
+    # Supplier B has no minimum order, so losing all its pairs leaves nothing to constrain.
+    # Only item A's minimum stock can be violated: item B already meets its minimum, and neither
+    # item can reach its maximum even with every variable at its upper bound
+    assert set(model.constraints) == {'Min_Stock_1', 'Min_Pallets_1', 'Max_Pallets_1'}
     
-    if results_df is not None and not results_df.empty:
-        # Check that supplier minimum and maximum constraints are respected
-        for supplier_id in data['suppliers']:
-            supplier_orders = results_df[results_df['SupplierID'] == supplier_id]
-            total_pallets = supplier_orders['PalletsOrdered'].sum() if not supplier_orders.empty else 0
-            
-            if total_pallets > 0:  # Only check if we're using this supplier
-                min_pallets = data['suppliers'][supplier_id]['min_pallets']
-                max_pallets = data['suppliers'][supplier_id]['max_pallets']
+    results_df, total_cost = solve_model(model, x, data)
+    assert results_df is not None
+    assert set(results_df['SupplierID']) == {1}
+
+# Test that the optimization respects supplier constraints
+def test_supplier_constraints(source_solutions):
+    for solution in source_solutions.values():
+        data = solution['data']
+        results_df = solution['results_df']
+        
+        if results_df is not None and not results_df.empty:
+            # Check that supplier minimum and maximum constraints are respected
+            by_sup = results_df.groupby('SupplierID')['PalletsOrdered'].sum().to_dict()
+            for supplier_id in data['suppliers']:
+                total_pallets = by_sup.get(supplier_id, 0)
                 
-                assert total_pallets >= min_pallets
-                assert total_pallets <= max_pallets
+                if total_pallets > 0:  # Only check if we're using this supplier
+                    min_pallets = data['suppliers'][supplier_id]['min_pallets']
+                    max_pallets = data['suppliers'][supplier_id]['max_pallets']
+                    
+                    assert total_pallets >= min_pallets
+                    assert total_pallets <= max_pallets
 
 # Test that the optimization respects stock level constraints
-def test_stock_level_constraints():
-    items_df = load_item_data()
-    suppliers_df = load_supplier_data()
-    pricing_df = load_pricing_data()
+def test_stock_level_constraints(source_solutions):
+    for solution in source_solutions.values():
+        data = solution['data']
+        results_df = solution['results_df']
+        
+        if results_df is not None and not results_df.empty:
+            # Check that stock level constraints are respected
+            by_item = results_df.groupby('ItemID')['UnitsOrdered'].sum().to_dict()
+            for item_id in data['items']:
+                total_ordered = by_item.get(item_id, 0)
+                current_stock = data['items'][item_id]['current_stock']
+                min_stock = data['items'][item_id]['min_stock']
+                max_stock = data['items'][item_id]['max_stock']
+                
+                assert current_stock + total_ordered >= min_stock
+                assert current_stock + total_ordered <= max_stock
+
+# Test that the saved plan reads back as the results it was written from
+def test_save_results(source_solutions, tmp_path):
+    solution = source_solutions['pulp']
+    output_file = save_results(solution['results_df'], solution['total_cost'], tmp_path / "plan.csv")
+    
+    pd.testing.assert_frame_equal(pd.read_csv(output_file), solution['results_df'], check_dtype=False)
+    
+    # Byte for byte what DataFrame.to_csv writes, line endings included
+    assert Path(output_file).read_bytes() == solution['results_df'].to_csv(index=False).encode()
+
+# Test that letting CBC use several threads finds the same optimum
+def test_threaded_solve(source_solutions):
+    assert source_solutions['pulp_threaded']['total_cost'] == pytest.approx(source_solutions['pulp']['total_cost'])
+
+# Test that re-solving from a previous plan (MIP start) gives the same optimum
+def test_warm_start(source_solutions):
+    solution = source_solutions['pulp']
+    data = solution['data']
+    
+    warm_state = extract_warm_state(solution['x'])
+    assert set(warm_state) == set(solution['x'])
     
-    data = prepare_data_for_optimization(items_df, suppliers_df, pricing_df)
     model, x = create_optimization_model(data)
-    results_df, total_cost = solve_model(model, x, data)
+    warm_results_df, warm_total_cost = solve_model(model, x, data, warm_from=warm_state)
+    
+    assert warm_total_cost == pytest.approx(solution['total_cost'])
+    assert warm_results_df['PalletsOrdered'].sum() == solution['results_df']['PalletsOrdered'].sum()
+
+# Test that solving straight from an MPS file gives the same optimum, and re-solving reuses the file
+def test_cbc_mps_backend(source_solutions, tmp_path):
+    solution = source_solutions['pulp']
+    data = solution['data']
+    mps_path = tmp_path / "model.mps"
+    
+    model, x = create_optimization_model(data)
+    results_df, total_cost = solve_model(model, x, data, backend='cbc_mps', mps_path=mps_path)
+    assert model.status == pulp.LpStatusOptimal
+    assert total_cost == pytest.approx(solution['total_cost'])
+    assert results_df['TotalCost'].sum() == pytest.approx(solution['total_cost'])
+    
+    written_at = mps_path.stat().st_mtime_ns
+    assert write_mps_once(model, mps_path) == mps_path
+    warm_results_df, warm_total_cost = solve_model(
+        model, x, data, warm_from=extract_warm_state(x), backend='cbc_mps', mps_path=mps_path
+    )
+    assert mps_path.stat().st_mtime_ns == written_at
+    assert warm_total_cost == pytest.approx(total_cost)
+
+# Test that every backend reports an item that can't reach its minimum stock as infeasible
+def test_infeasible_on_every_backend(tmp_path):
+    items_data = {
+        'ItemID': [1, 2],
+        'Name': ['Item A', 'Item B'],
+        'MinStock': [10, 20],
+        'MaxStock': [100, 40],
+        'Expiry (days)': [60, 40],
+        'CurrentStock': [5, 5],
+        'AverageDailySale': [1, 2]
+    }
+    
+    suppliers_data = {
+        'SupplierID': [1],
+        'Name': ['Supplier A'],
+        'MinPallets': [1],
+        'MaxPallets': [50],
+        'LeadTime (days)': [3]
+    }
+    
+    # No supplier sells item B, so it can never get from 5 to its minimum of 20
+    pricing_data = {
+        'SupplierID': [1],
+        'ItemID': [1],
+        'CostPerPallet': [100]
+    }
+    
+    data = prepare_data_for_optimization(
+        pd.DataFrame(items_data), pd.DataFrame(suppliers_data), pd.DataFrame(pricing_data)
+    )
+    
+    model, x = create_optimization_model(data)
+    assert solve_model(model, x, data) == (None, None)
+    
+    model, x = create_optimization_model(data)
+    assert solve_model(model, x, data, backend='cbc_mps', mps_path=tmp_path / "model.mps") == (None, None)
+    assert model.status == pulp.LpStatusInfeasible
+    
+    try:
+        import mip  # noqa: F401
+    except ImportError:
+        return
+    model, x = create_optimization_model_mip(data)
+    assert solve_model(model, x, data, backend='mip') == (None, None)
+
+# Test a model where every item is already at its maximum stock, so every pair is pruned
+@pytest.mark.parametrize("min_pallets", [1, 0])
+def test_all_pairs_pruned_on_every_backend(tmp_path, min_pallets):
+    items_data = {
+        'ItemID': [1, 2],
+        'Name': ['Item A', 'Item B'],
+        'MinStock': [10, 20],
+        'MaxStock': [100, 40],
+        'Expiry (days)': [60, 40],
+        'CurrentStock': [100, 40],
+        'AverageDailySale': [1, 2]
+    }
+    
+    suppliers_data = {
+        'SupplierID': [1],
+        'Name': ['Supplier A'],
+        'MinPallets': [min_pallets],
+        'MaxPallets': [50],
+        'LeadTime (days)': [3]
+    }
+    
+    pricing_data = {
+        'SupplierID': [1, 1],
+        'ItemID': [1, 2],
+        'CostPerPallet': [100, 120]
+    }
+    
+    data = prepare_data_for_optimization(
+        pd.DataFrame(items_data), pd.DataFrame(suppliers_data), pd.DataFrame(pricing_data)
+    )
+    
+    # Nothing can be ordered, so a supplier minimum makes the model infeasible; without one
+    # the optimal plan is empty and costs nothing
+    def check(result):
+        pallets, cost = result
+        if min_pallets:
+            assert (pallets, cost) == (None, None)
+        else:
+            assert pallets.empty
+            assert cost == 0.0
+    
+    model, x = create_optimization_model(data)
+    check(solve_model(model, x, data))
+    
+    model, x = create_optimization_model(data)
+    check(solve_model(model, x, data, backend='cbc_mps', mps_path=tmp_path / "model.mps"))
+    
+    try:
+        import mip  # noqa: F401
+    except ImportError:
+        return
+    model, x = create_optimization_model_mip(data)
+    check(solve_model(model, x, data, backend='mip'))
+
+# Test that the python-mip backend builds the same model as the PuLP one
+def test_mip_backend_model(source_solutions):
+    pytest.importorskip("mip")
+    
+    solution = source_solutions['pulp']
+    mip_solution = source_solutions['mip']
+    assert set(mip_solution['x']) == set(solution['x'])
+    assert len(mip_solution['model'].constrs) == len(solution['model'].constraints)
     
-    if results_df is not None and not results_df.empty:
-        # Check that stock level constraints are respected
-        for item_id in data['items']:
-            item_orders = results_df[results_df['ItemID'] == item_id]
-            total_ordered = item_orders['UnitsOrdered'].sum() if not item_orders.empty else 0
-            current_stock = data['items'][item_id]['current_stock']
-            min_stock = data['items'][item_id]['min_stock']
-            max_stock = data['items'][item_id]['max_stock']
-            
-            assert current_stock + total_ordered >= min_stock
-            assert current_stock + total_ordered <= max_stock
+    assert mip_solution['total_cost'] == pytest.approx(solution['total_cost'])
+    assert mip_solution['results_df']['TotalCost'].sum() == pytest.approx(solution['total_cost'])
+    assert mip_solution['results_df'].columns.tolist() == solution['results_df'].columns.tolist()
 
 if __name__ == "__main__":
     # Run the tests